@@ -1,12 +1,135 @@
-from dash import Input, Output, callback, callback_context
+import itertools
+import threading
+import uuid
+from dash import Input, Output, State, Patch, callback, callback_context, no_update
+import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from utils.graphs import create_tennis_court_shapes, add_shot_data, create_placement_analysis, create_speed_analysis, COURT_LENGTH
+from utils.graphs import create_tennis_court_shapes, add_shot_data, group_live_shots, create_live_shot_trace, count_shot_zones, create_zone_annotations, create_outcome_overlay, create_placement_analysis, create_speed_analysis, transform_to_player_perspective, COURT_LENGTH
 from utils.data_reader import read_data
+from utils.spatial_index import CourtGridIndex, build_player_indexes
+from utils.live_feed import ShotFeed, LiveShotBuffer, LIVE_EXPORT_PATH
+from utils.outcomes import label_point_outcomes, load_outcome_model, POINT_COLS
 
 df = read_data()
 
-df = df[~df['Stroke'].isin(['Feed','Serve'])]
+# Point outcomes need the full point, including serves and feeds
+df['Outcome'] = label_point_outcomes(df)
+
+df = df[~df['Stroke'].isin(['Feed','Serve'])].copy()
+
+# Stroke colors, extended when live shots bring new stroke types
+colors = px.colors.qualitative.Set2
+stroke_colors = {val: colors[i % len(colors)] for i, val in enumerate(df['Stroke'].unique())}
+df['color'] = df['Stroke'].map(stroke_colors)
+
+# Result and spin filter options, extended when live shots bring new values
+result_values = list(df['Result'].unique())
+spin_values = list(df['Spin'].unique())
+
+perspective_df = transform_to_player_perspective(df)
+
+# Spatial index over the transformed bounce coordinates, built once per player perspective
+court_indexes = build_player_indexes(perspective_df)
+
+# Per-zone outcome rates, cached per dataset version
+outcome_model = load_outcome_model(perspective_df)
+
+# Last shot of each live point, relabelled as a continuation if the point carries on.
+# Only feed rows are tracked: a new session restarts at point (1, 1, 1), and those
+# points must not be matched against the base workbook.
+point_terminal_labels = {}
+
+# Live session feed, new shots are buffered with index labels following df
+live_feed = ShotFeed(LIVE_EXPORT_PATH, start_label=int(df.index.max()) + 1) if LIVE_EXPORT_PATH else None
+live_shots = LiveShotBuffer()
+live_lock = threading.Lock()
+_all_shots = (None, df)
+
+# Every court render gets a new token. Stream updates carrying the token of an
+# older render than the last one sent to their page are dropped.
+render_tokens = itertools.count(1)
+latest_renders = {}
+
+
+def all_shots():
+    """Base dataset followed by the live shots received so far"""
+    global _all_shots
+    live = live_shots.frame()
+    cached_live, shots = _all_shots
+    if live is cached_live:
+        return shots
+    shots = pd.concat([df, live])
+    _all_shots = (live, shots)
+    return shots
+
+
+def poll_live_shots():
+    """Append shots newly written to the live export to the live buffer"""
+    with live_lock:
+        new_shots = live_feed.poll()
+        if new_shots.empty:
+            return
+        new_shots['Outcome'] = label_point_outcomes(new_shots)
+
+        # Outcome count changes of this poll, published to the model in one update
+        outcome_changes = []
+
+        # Points that continue in the new rows no longer end on their previous last shot
+        for point in set(new_shots[POINT_COLS].itertuples(index=False, name=None)):
+            label = point_terminal_labels.pop(point, None)
+            if label is not None:
+                chunk = live_shots.chunk_of(label)
+                outcome_changes.append((transform_to_player_perspective(chunk.loc[[label]]), -1))
+                chunk.loc[label, 'Outcome'] = 'Continuation'
+                outcome_changes.append((transform_to_player_perspective(chunk.loc[[label]]), 1))
+
+        new_shots = new_shots[~new_shots['Stroke'].isin(['Feed','Serve'])].copy()
+        if new_shots.empty:
+            if outcome_changes:
+                outcome_model.update(outcome_changes)
+            return
+        terminal_shots = new_shots[new_shots['Outcome'] != 'Continuation']
+        point_terminal_labels.update(zip(terminal_shots[POINT_COLS].itertuples(index=False, name=None), terminal_shots.index))
+
+        for stroke in new_shots['Stroke'].unique():
+            if stroke not in stroke_colors:
+                stroke_colors[stroke] = colors[len(stroke_colors) % len(colors)]
+        new_shots['color'] = new_shots['Stroke'].map(stroke_colors)
+        result_values.extend(result for result in new_shots['Result'].unique() if result not in result_values)
+        spin_values.extend(spin for spin in new_shots['Spin'].unique() if spin not in spin_values)
+
+        # Buffer the rows before indexing them, so the index never holds labels the buffer lacks
+        live_shots.append(new_shots)
+
+        transformed = transform_to_player_perspective(new_shots)
+        outcome_changes.append((transformed, 1))
+        outcome_model.update(outcome_changes)
+        for player, player_shots in transformed.groupby('Player'):
+            if player in court_indexes:
+                court_indexes[player].extend(player_shots)
+            else:
+                court_indexes[player] = CourtGridIndex(player_shots)
+
+
+def filter_shots(shots, player_perspective, selected_strokes, selected_results, selected_spins):
+    """Apply the dashboard filters and the player perspective transformation"""
+    # Filter data to show only the selected player's shots
+    filtered_df = shots[(shots['Player'] == player_perspective) & (shots['Spin'].isin(selected_spins))]
+
+    # PROPER PERSPECTIVE TRANSFORMATION
+    # Transform coordinates to show receiving player's perspective
+    filtered_df = transform_to_player_perspective(filtered_df)
+    
+    # Rest of your existing filtering logic...
+    if selected_strokes and len(selected_strokes) < len(stroke_colors):
+        filtered_df = filtered_df[filtered_df['Stroke'].isin(selected_strokes)]
+    
+    if selected_results and len(selected_results) > 0:
+        filtered_df = filtered_df[filtered_df['Result'].isin(selected_results)]
+
+    return filtered_df
+
 
 @callback(
     Output('player-store','data'),
@@ -45,60 +168,46 @@ def update_player_click(n_click_player_1, n_click_player_2, player1, player2):
     [Output('tennis-court-half', 'figure'),
      Output('depth-analysis', 'figure'),
      Output('direction-analysis', 'figure'),
-     Output('speed-analysis', 'figure')],
+     Output('speed-analysis', 'figure'),
+     Output('live-store', 'data')],
     [
      Input('stroke-dropdown', 'value'),
      Input('result-filter', 'value'),
      Input('spin-filter', 'value'),
      Input('player-store','data'),
-     Input('shot-spin-switch','value')],
+     Input('shot-spin-switch','value'),
+     Input('tennis-court-half', 'selectedData'),
+     Input('outcome-switch', 'value')],
+    # Reading the live state makes Dash wait for an in-flight stream update before rendering
+    State('live-store', 'data'),
      prevent_initial_call=True
 )
 # Replace this section in your callbacks.py update_charts function
 
-def update_charts(selected_strokes, selected_results, selected_spins, selected_player, shot_spin_view):
+def update_charts(selected_strokes, selected_results, selected_spins, selected_player, shot_spin_view, selected_region, outcome_view, previous_state):
     """
     Updated callback to handle single player perspective and modern UI controls
     """
     player_perspective = selected_player['player_perspective']
-    # Filter data to show only the selected player's shots
-    filtered_df = df[(df['Player'] == player_perspective) & (df['Spin'].isin(selected_spins))].copy()
+    # Snapshot the dataset so live shots appended meanwhile are streamed, not drawn twice
+    shots = all_shots()
+
+    # Lasso/box selection on the court only narrows the analysis charts
+    if callback_context.triggered_id == 'tennis-court-half':
+        # Resolve the region through the index first so only the selected shots are filtered
+        region_labels = court_indexes[player_perspective].query(selected_region)
+        if region_labels is not None:
+            # The index may already hold live shots polled after this snapshot was taken
+            shots = shots.loc[shots.index.intersection(region_labels)]
+        region_df = filter_shots(shots, player_perspective, selected_strokes, selected_results, selected_spins)
+
+        depth_fig, direction_fig = create_placement_analysis(region_df)
+        speed_fig = create_speed_analysis(region_df)
+
+        return no_update, depth_fig, direction_fig, speed_fig, no_update
+
+    filtered_df = filter_shots(shots, player_perspective, selected_strokes, selected_results, selected_spins)
 
-    # PROPER PERSPECTIVE TRANSFORMATION
-    # Transform coordinates to show receiving player's perspective
-    def transform_to_player_perspective(row):
-        x, y, result = row['Bounce (x)'], row['Bounce (y)'], row['Result']
-        
-        # Handle net shots - clamp them to the net line
-        if result == 'Net':
-            return x, COURT_LENGTH  # Place all net shots at the net line
-        
-        # If shot is on the opposite side of the net (y > COURT_LENGTH)
-        if y > COURT_LENGTH:
-            # Transform both coordinates for proper perspective
-            new_x = -x  # Mirror across center line
-            new_y = (2 * COURT_LENGTH) - y  # Flip across net line
-            
-            # DON'T clamp - let shots go beyond baseline if they were deep on opponent's side
-            # This preserves the true perspective of how deep/short the shot appeared
-            
-            return new_x, new_y
-        else:
-            # Shot is already on player's side, no transformation needed
-            return x, y
-    
-    # Apply transformation
-    transformed_coords = filtered_df.apply(transform_to_player_perspective, axis=1, result_type='expand')
-    filtered_df['Bounce (x)'] = transformed_coords[0]
-    filtered_df['Bounce (y)'] = transformed_coords[1]
-    
-    # Rest of your existing filtering logic...
-    if selected_strokes and len(selected_strokes) < len(df['Stroke'].unique()):
-        filtered_df = filtered_df[filtered_df['Stroke'].isin(selected_strokes)]
-    
-    if selected_results and len(selected_results) > 0:
-        filtered_df = filtered_df[filtered_df['Result'].isin(selected_results)]
-    
     # Create court visualization
     shapes, annotations = create_tennis_court_shapes()
     
@@ -110,15 +219,114 @@ def update_charts(selected_strokes, selected_results, selected_spins, selected_p
         xaxis=dict(range=[-8,8],showgrid=False, zeroline=False, visible=False),
         yaxis=dict(range=[-5, COURT_LENGTH + 3],showgrid=False, zeroline=False, visible=False),
         height=600,
-        margin=dict(l=0, r=0, t=0, b=0)
+        margin=dict(l=0, r=0, t=0, b=0),
+        dragmode='lasso'
     ))
+    # The page keeps its client id across renders, the render token changes every time
+    client = (previous_state or {}).get('client') or uuid.uuid4().hex
+    render = next(render_tokens)
+    latest_renders[client] = render
+    court_fig.update_layout(meta={'render': render})
+    # Read before the rates, so an update landing in between is redrawn by the stream
+    outcome_version = outcome_model.version
+    if outcome_view:
+        # Outcome overlay comes from the precomputed per-zone arrays
+        rates, totals = outcome_model.zone_rates(player_perspective, selected_strokes)
+        court_fig.add_trace(create_outcome_overlay(rates, totals))
     court_fig = add_shot_data(court_fig, filtered_df, shot_spin_view)
     
     # Create analysis charts
     depth_fig, direction_fig = create_placement_analysis(filtered_df)
     speed_fig = create_speed_analysis(filtered_df)
+
+    # Zone counts behind the court percentages, updated incrementally by live mode.
+    # Live shots go into one trace per marker style, appended after the current traces.
+    zone_counts, depth_counts = count_shot_zones(filtered_df)
+    live_state = {
+        'client': client,
+        'render': render,
+        'last_label': int(shots.index[-1]) if len(shots) else -1,
+        'outcome_version': outcome_version,
+        'zone_counts': zone_counts,
+        'depth_counts': depth_counts,
+        'n_traces': len(court_fig.data),
+        'live_traces': {},
+    }
     
-    return court_fig, depth_fig, direction_fig, speed_fig
+    return court_fig, depth_fig, direction_fig, speed_fig, live_state
+
+
+@callback(
+    Output('tennis-court-half', 'figure', allow_duplicate=True),
+    Output('live-store', 'data', allow_duplicate=True),
+    Input('live-interval', 'n_intervals'),
+    State('stroke-dropdown', 'value'),
+    State('result-filter', 'value'),
+    State('spin-filter', 'value'),
+    State('player-store', 'data'),
+    State('shot-spin-switch', 'value'),
+    State('outcome-switch', 'value'),
+    State('live-store', 'data'),
+    prevent_initial_call=True
+)
+def stream_live_shots(n_intervals, selected_strokes, selected_results, selected_spins, selected_player, shot_spin_view, outcome_view, live_state):
+    """
+    Send only shots that arrived since the last update and patch the zone percentages
+    """
+    if live_feed is None or live_state is None:
+        return no_update, no_update
+    # A newer render replaced the figure this state describes, its traces may no longer match
+    if latest_renders.get(live_state.get('client')) != live_state.get('render'):
+        return no_update, no_update
+
+    poll_live_shots()
+
+    # A poll may only relabel outcomes of earlier shots, which changes the overlay without new rows
+    outcome_version = outcome_model.version
+    refresh_overlay = outcome_view and live_state.get('outcome_version') != outcome_version
+
+    # Labels are increasing, so new shots are the tail after the last label sent
+    new_shots = live_shots.after(live_state['last_label'])
+    if new_shots.empty and not refresh_overlay:
+        return no_update, no_update
+
+    player_perspective = selected_player['player_perspective']
+    court_patch = Patch()
+    if refresh_overlay:
+        # The overlay is the first trace, refresh it from the updated outcome arrays
+        rates, totals = outcome_model.zone_rates(player_perspective, selected_strokes)
+        court_patch['data'][0] = create_outcome_overlay(rates, totals)
+        live_state['outcome_version'] = outcome_version
+    if new_shots.empty:
+        return court_patch, live_state
+    live_state['last_label'] = int(new_shots.index[-1])
+
+    filtered_df = filter_shots(new_shots, player_perspective, selected_strokes, selected_results, selected_spins)
+    if filtered_df.empty:
+        return (court_patch if refresh_overlay else no_update), live_state
+
+    zone_counts, depth_counts = count_shot_zones(filtered_df)
+    live_state['zone_counts'] = [a + b for a, b in zip(live_state['zone_counts'], zone_counts)]
+    live_state['depth_counts'] = {depth: live_state['depth_counts'][depth] + count for depth, count in depth_counts.items()}
+
+    # Extend the live trace of each marker style, so the number of traces stays fixed
+    for style, group in group_live_shots(filtered_df, shot_spin_view).items():
+        trace_index = live_state['live_traces'].get(style)
+        if trace_index is None:
+            court_patch['data'].append(create_live_shot_trace(group))
+            live_state['live_traces'][style] = live_state['n_traces']
+            live_state['n_traces'] += 1
+        else:
+            trace = court_patch['data'][trace_index]
+            trace['x'].extend(group['x'])
+            trace['y'].extend(group['y'])
+            trace['marker']['size'].extend(group['size'])
+            trace['text'].extend(group['text'])
+
+    _, annotations = create_tennis_court_shapes()
+    court_patch['layout']['annotations'] = annotations + create_zone_annotations(live_state['zone_counts'], live_state['depth_counts'])
+
+    return court_patch, live_state
 
 
 # Remove the player options callback since we're using radio buttons now
@@ -133,15 +341,9 @@ def update_stroke_options(selected_strokes):
     """
     from dash import html
 
-    colors = px.colors.qualitative.Set2
-    unique_vals = df['Stroke'].unique()
-    color_map = {val: colors[i % len(colors)] for i, val in enumerate(unique_vals)}
-    df['color'] = df['Stroke'].map(color_map)
-    
-    
     options = []
-    for stroke in df['Stroke'].unique():
-        color = df.loc[df['Stroke'] == stroke, 'color'].iloc[0]
+    for stroke in stroke_colors:
+        color = stroke_colors[stroke]
         
         # Add checkmark for selected strokes
         if selected_strokes and stroke in selected_strokes:
@@ -177,7 +379,7 @@ def update_result_options(selected_results):
     }
     
     options = []
-    for result in df[~df['Result'].isin(['Net'])]['Result'].unique():
+    for result in [result for result in result_values if result != 'Net']:
         marker_info = result_markers.get(result, {'symbol': '●', 'color': '#6C757D'})
         
         # Add checkmark for selected results
@@ -218,7 +420,7 @@ def update_spin_options(selected_spins):
     }
     
     options = []
-    for spin in df['Spin'].unique():
+    for spin in spin_values:
         marker_info = spin_markers.get(spin, {'symbol': '●', 'color': '#6C757D'})
 
         # Add checkmark for selected spins
@@ -0,0 +1,275 @@
+"""
+Replay Dash callback traffic against a locally started app and report latency.
+
+Start the app first, either with the dev server or with gunicorn, e.g.
+
+    python app.py
+    gunicorn app:server --workers 4 --threads 2 --bind 127.0.0.1:8080
+
+then run
+
+    python load_test.py --concurrency 8 --duration 60 --pid <server pid>
+
+Each virtual user replays a dashboard session: the initial page load
+callbacks, followed by random filter changes, player switches and court
+selections drawn from the dataset.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import requests
+
+from utils.data_reader import read_data
+from utils.graphs import COURT_LENGTH, singles_width
+
+DEFAULT_URL = 'http://127.0.0.1:8080/swing-vision-tennis-shot-placement/'
+
+df = read_data()
+df = df[~df['Stroke'].isin(['Feed','Serve'])]
+
+PLAYERS = df['Player'].unique().tolist()
+STROKE_OPTIONS = df['Stroke'].unique().tolist()
+RESULT_OPTIONS = df['Result'].unique().tolist()
+SPIN_OPTIONS = df['Spin'].unique().tolist()
+
+# Callbacks replayed by the load test: name -> (outputs, input ids/properties, state ids/properties)
+CALLBACKS = {
+    'update_player_click': (
+        [('player-store', 'data'), ('player-1', 'style'), ('player-2', 'style')],
+        [('player-1', 'n_clicks'), ('player-2', 'n_clicks'), ('player-1', 'value'), ('player-2', 'value')],
+        [],
+    ),
+    'update_charts': (
+        [('tennis-court-half', 'figure'), ('depth-analysis', 'figure'),
+         ('direction-analysis', 'figure'), ('speed-analysis', 'figure'), ('live-store', 'data')],
+        [('stroke-dropdown', 'value'), ('result-filter', 'value'), ('spin-filter', 'value'),
+         ('player-store', 'data'), ('shot-spin-switch', 'value'), ('tennis-court-half', 'selectedData'),
+         ('outcome-switch', 'value')],
+        [('live-store', 'data')],
+    ),
+    'update_stroke_options': ([('stroke-dropdown', 'options')], [('stroke-dropdown', 'value')], []),
+    'update_result_options': ([('result-filter', 'options')], [('result-filter', 'value')], []),
+    'update_spin_options': ([('spin-filter', 'options')], [('spin-filter', 'value')], []),
+}
+
+
+def output_string(outputs):
+    """Build the output id string Dash uses to look up a callback"""
+    if len(outputs) == 1:
+        return '{}.{}'.format(*outputs[0])
+    return '..' + '...'.join('{}.{}'.format(*output) for output in outputs) + '..'
+
+
+def build_payload(name, values, changed):
+    """Build the JSON body of a /_dash-update-component request"""
+    outputs, inputs, states = CALLBACKS[name]
+    output_specs = [{'id': id_, 'property': prop} for id_, prop in outputs]
+    return {
+        'output': output_string(outputs),
+        'outputs': output_specs[0] if len(outputs) == 1 else output_specs,
+        'inputs': [
+            {'id': id_, 'property': prop, 'value': values.get((id_, prop))}
+            for id_, prop in inputs
+        ],
+        'changedPropIds': ['{}.{}'.format(*prop) for prop in changed],
+        'state': [
+            {'id': id_, 'property': prop, 'value': values.get((id_, prop))}
+            for id_, prop in states
+        ],
+    }
+
+
+def random_subset(rng, options):
+    """Random non-empty subset of filter options, in option order"""
+    chosen = set(rng.sample(options, rng.randint(1, len(options))))
+    return [option for option in options if option in chosen]
+
+
+def random_selection(rng):
+    """Random box or lasso selection on the court"""
+    x0, x1 = sorted(rng.uniform(-singles_width/2, singles_width/2) for _ in range(2))
+    y0, y1 = sorted(rng.uniform(0, COURT_LENGTH) for _ in range(2))
+    if rng.random() < 0.5:
+        return {'points': [], 'range': {'x': [x0, x1], 'y': [y0, y1]}}
+    return {'points': [], 'lassoPoints': {'x': [x0, x1, x1, x0], 'y': [y0, y0, y1, y1]}}
+
+
+def generate_session(rng, interactions):
+    """Yield (callback name, payload) pairs for one simulated dashboard session drawn from rng"""
+    values = {
+        ('player-1', 'n_clicks'): None,
+        ('player-2', 'n_clicks'): None,
+        ('player-1', 'value'): PLAYERS[0],
+        ('player-2', 'value'): PLAYERS[1 % len(PLAYERS)],
+        ('stroke-dropdown', 'value'): STROKE_OPTIONS,
+        ('result-filter', 'value'): RESULT_OPTIONS,
+        ('spin-filter', 'value'): SPIN_OPTIONS,
+        ('player-store', 'data'): {'player_perspective': PLAYERS[0]},
+        ('shot-spin-switch', 'value'): False,
+        ('tennis-court-half', 'selectedData'): None,
+        ('outcome-switch', 'value'): False,
+        # Live state of the page, the app only reads the client id back
+        ('live-store', 'data'): {'client': '{:032x}'.format(rng.getrandbits(128))},
+    }
+
+    # Initial page load
+    yield 'update_player_click', build_payload('update_player_click', values, [])
+    yield 'update_stroke_options', build_payload('update_stroke_options', values, [])
+    yield 'update_result_options', build_payload('update_result_options', values, [])
+    yield 'update_spin_options', build_payload('update_spin_options', values, [])
+    yield 'update_charts', build_payload('update_charts', values, [('player-store', 'data')])
+
+    filters = {
+        'update_stroke_options': (('stroke-dropdown', 'value'), STROKE_OPTIONS),
+        'update_result_options': (('result-filter', 'value'), RESULT_OPTIONS),
+        'update_spin_options': (('spin-filter', 'value'), SPIN_OPTIONS),
+    }
+
+    for _ in range(interactions):
+        action = rng.choice(['filter', 'filter', 'player', 'spin-switch', 'outcome-switch', 'selection'])
+        values[('tennis-court-half', 'selectedData')] = None
+
+        if action == 'filter':
+            name = rng.choice(list(filters))
+            prop, options = filters[name]
+            values[prop] = random_subset(rng, options)
+            yield name, build_payload(name, values, [prop])
+            yield 'update_charts', build_payload('update_charts', values, [prop])
+        elif action == 'player':
+            button = rng.choice(['player-1', 'player-2'])
+            prop = (button, 'n_clicks')
+            values[prop] = (values[prop] or 0) + 1
+            values[('player-store', 'data')] = {'player_perspective': values[(button, 'value')]}
+            yield 'update_player_click', build_payload('update_player_click', values, [prop])
+            yield 'update_charts', build_payload('update_charts', values, [('player-store', 'data')])
+        elif action in ('spin-switch', 'outcome-switch'):
+            prop = ({'spin-switch': 'shot-spin-switch', 'outcome-switch': 'outcome-switch'}[action], 'value')
+            values[prop] = not values[prop]
+            yield 'update_charts', build_payload('update_charts', values, [prop])
+        else:
+            prop = ('tennis-court-half', 'selectedData')
+            values[prop] = random_selection(rng)
+            yield 'update_charts', build_payload('update_charts', values, [prop])
+
+
+def process_rss(pid):
+    """Resident set size in bytes of a process and its children (Linux /proc)"""
+    total = 0
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    total += int(line.split()[1]) * 1024
+        for task in os.listdir('/proc/{}/task'.format(pid)):
+            with open('/proc/{}/task/{}/children'.format(pid, task)) as f:
+                for child in f.read().split():
+                    total += process_rss(int(child))
+    except (FileNotFoundError, ProcessLookupError):
+        pass
+    return total
+
+
+class Recorder:
+    """Thread-safe collection of request timings and errors"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, name, latency, ok):
+        with self.lock:
+            self.latencies[name].append(latency)
+            if not ok:
+                self.errors[name] += 1
+
+
+def run_user(session, url, recorder, deadline, interactions, rng):
+    """Replay sessions for one virtual user until the deadline"""
+    while time.monotonic() < deadline:
+        for name, payload in generate_session(rng, interactions):
+            if time.monotonic() >= deadline:
+                return
+            start = time.perf_counter()
+            try:
+                response = session.post(url, json=payload, timeout=60)
+                ok = response.status_code in (200, 204)
+            except requests.RequestException:
+                ok = False
+            recorder.record(name, time.perf_counter() - start, ok)
+
+
+def check_callbacks(base_url):
+    """Make sure the running app exposes every callback the load test replays"""
+    response = requests.get(base_url + '_dash-dependencies', timeout=10)
+    response.raise_for_status()
+    registered = {dependency['output'] for dependency in response.json()}
+    missing = [name for name, (outputs, _, _) in CALLBACKS.items() if output_string(outputs) not in registered]
+    if missing:
+        raise SystemExit('Callbacks not registered by the app: {}'.format(', '.join(missing)))
+
+
+def format_row(name, latencies, errors, elapsed):
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return '{:<24}{:>8}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}{:>9.2f}%'.format(
+        name, len(latencies), p50, p95, p99, len(latencies) / elapsed, 100 * errors / len(latencies)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay Dash callback traffic against a local app.')
+    parser.add_argument('--url', default=DEFAULT_URL, help='app base URL including url_base_pathname')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='test duration in seconds')
+    parser.add_argument('--interactions', type=int, default=20, help='interactions per session')
+    parser.add_argument('--pid', type=int, action='append', default=[],
+                        help='server pid to sample RSS from (children included), repeatable')
+    parser.add_argument('--seed', type=int, help='random seed for reproducible sessions, user i draws from seed + i')
+    args = parser.parse_args()
+
+    base_url = args.url if args.url.endswith('/') else args.url + '/'
+    check_callbacks(base_url)
+
+    recorder = Recorder()
+    deadline = time.monotonic() + args.duration
+    # One generator per virtual user, so a seeded run does not depend on thread scheduling
+    threads = [
+        threading.Thread(
+            target=run_user,
+            args=(requests.Session(), base_url + '_dash-update-component', recorder, deadline, args.interactions,
+                  random.Random(None if args.seed is None else args.seed + i)),
+        )
+        for i in range(args.concurrency)
+    ]
+
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    rss_samples = []
+    while any(thread.is_alive() for thread in threads):
+        if args.pid:
+            rss_samples.append(sum(process_rss(pid) for pid in args.pid))
+        time.sleep(0.5)
+    elapsed = time.monotonic() - start
+
+    print('{:<24}{:>8}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'callback', 'count', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'errors'))
+    for name in CALLBACKS:
+        if recorder.latencies[name]:
+            print(format_row(name, recorder.latencies[name], recorder.errors[name], elapsed))
+    all_latencies = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    if all_latencies:
+        print(format_row('total', all_latencies, sum(recorder.errors.values()), elapsed))
+    if rss_samples:
+        print('worker RSS: peak {:.1f} MB, final {:.1f} MB'.format(
+            max(rss_samples) / 2**20, rss_samples[-1] / 2**20))
+
+
+if __name__ == '__main__':
+    main()
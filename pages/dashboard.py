@@ -2,6 +2,7 @@ import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 from utils.data_reader import read_data
+from utils.live_feed import LIVE_EXPORT_PATH, LIVE_POLL_INTERVAL
 
 dash.register_page(__name__, path='/', name='Tennis Analytics')
 
@@ -101,6 +102,20 @@ def layout():
                                         className="mb-3"
                                     )
                                 ]),
+
+                                html.Div([
+                                    dbc.Stack(
+                                        [
+                                            html.Label("Outcomes", className="form-label text-muted mb-2", style={'fontSize': '14px', 'fontWeight': '600'}),
+                                            dbc.Switch(
+                                                id="outcome-switch",
+                                                value=False,
+                                                className="ms-auto",
+                                            ),
+                                        ],
+                                        direction="horizontal",
+                                    ),
+                                ]),
                             ],
                             direction="horizontal",
                             gap=5
@@ -118,7 +133,9 @@ def layout():
                                 html.Br(), 
                                 "• Colors represent stroke types",
                                 html.Br(),
-                                "• Markers shapes show shot results and spins"
+                                "• Markers shapes show shot results and spins",
+                                html.Br(),
+                                "• Outcomes overlay shows win (W), error (E) and continuation (C) rates per zone"
                             ], className="text-muted", style={'lineHeight': '1.4'})
                         ], className="mt-3 p-2 bg-light rounded")
                     ], className="p-2")
@@ -168,6 +185,9 @@ def layout():
                 ])
             ], md=6)
         ]),
-        dcc.Store(id='player-store')
+        dcc.Store(id='player-store'),
+        # Live session mode, polls the export set in LIVE_EXPORT_PATH
+        dcc.Interval(id='live-interval', interval=LIVE_POLL_INTERVAL, disabled=not LIVE_EXPORT_PATH),
+        dcc.Store(id='live-store')
         
     ], fluid=True, className="px-4 py-3")
\ No newline at end of file
@@ -1,5 +1,15 @@
 import pandas as pd
 
+# Numeric columns of the SwingVision Shots sheet
+NUMERIC_COLS = ["Speed (MPH)", "Point", "Game", "Set", "Bounce (x)", "Bounce (y)", 
+               "Hit (x)", "Hit (y)", "Hit (z)"]
+
+
+def convert_numeric(df):
+    """Convert numeric shot columns, coercing bad values to NaN"""
+    for col in NUMERIC_COLS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
 
 
 def read_data():
@@ -7,9 +17,4 @@ def read_data():
     df = pd.read_excel('./data/SwingVision-match-2025-08-29 at 16.40.52.xlsx',sheet_name='Shots')
     
     # Convert numeric columns
-    numeric_cols = ["Speed (MPH)", "Point", "Game", "Set", "Bounce (x)", "Bounce (y)", 
-                   "Hit (x)", "Hit (y)", "Hit (z)"]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    return df
\ No newline at end of file
+    return convert_numeric(df)
@@ -1,3 +1,4 @@
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 
@@ -11,6 +12,27 @@ singles_width = 8.23   # 8.23m singles court width
 zone_width = singles_width / 3  # Singles court width divided into 3 zones
 start_x = -singles_width/2  # Start from left singles sideline
 
+def transform_to_player_perspective(df):
+    """Mirror bounce coordinates onto the receiving player's half of the court"""
+    df = df.copy()
+    x = df['Bounce (x)'].to_numpy(dtype=float)
+    y = df['Bounce (y)'].to_numpy(dtype=float)
+    is_net = (df['Result'] == 'Net').to_numpy()
+
+    # Shots on the opposite side of the net (y > COURT_LENGTH) are mirrored across
+    # the center line and flipped across the net line. They are not clamped, so
+    # deep shots can still land beyond the baseline.
+    opposite_side = (y > COURT_LENGTH) & ~is_net
+    new_x = np.where(opposite_side, -x, x)
+    new_y = np.where(opposite_side, (2 * COURT_LENGTH) - y, y)
+
+    # Net shots are placed on the net line
+    new_y = np.where(is_net, COURT_LENGTH, new_y)
+
+    df['Bounce (x)'] = new_x
+    df['Bounce (y)'] = new_y
+    return df
+
 # Function to create tennis court lines
 def create_tennis_court_shapes():
     """Create shapes for half tennis court layout"""
@@ -119,127 +141,214 @@ def create_tennis_court_shapes():
     
     return shapes,annotations
 
-def add_shot_data(fig, filtered_df, shot_spin_view):
-    if filtered_df.empty:
-        return fig
+def shot_marker_style(row, shot_spin_view):
+    """Marker symbol, fill color and line color of a shot"""
+    marker_color = 'gray'
+    line_color = 'gray'
+    marker_symbol = 'circle'  # Default circle
+    
+    # Determine marker symbol based on result
+    if row['Result'] == 'In':
+        marker_color = row['color']
+        line_color = 'white'
+    elif row['Result'] == 'Out':
+        marker_color = 'white'
+        line_color = row['color']
+    else:  # Net
+        marker_color = 'white'
+        line_color = row['color']
 
-    # Calculate zone statistics (only for shots within singles court)
-    zone_counts = [0] * 3  # 3 zones
-    depth_counts = {"short": 0, "deep": 0}  # 2 depth zones
-    total_shots = 0
-    shots_in_analysis_area = 0  # For zone percentage calculations
+    if shot_spin_view:
+        if row['Spin'] == 'Topspin':
+            marker_symbol = 'triangle-up'  # Upward triangle
+        elif row['Spin'] == 'Flat':
+            marker_symbol = 'square'  # Square
+        elif row['Spin'] == 'Slice':
+            marker_symbol = 'diamond'  # Downward triangle
+
+    return marker_symbol, marker_color, line_color
+
+def shot_marker_size(row):
+    """Marker size scaled by ball speed"""
+    return max(8, min(20, row['Speed (MPH)'] / 3))
+
+def shot_hover_text(row):
+    """Hover text of a shot"""
+    return (
+        f"<b>{row['Player']}</b><br>"
+        f"Stroke: {row['Stroke']}<br>"
+        f"Speed: {row['Speed (MPH)']} MPH<br>"
+        f"Direction: {row['Direction']}<br>"
+        f"Result: {row['Result']}<br>"
+        f"Spin: {row['Spin']}<br>"
+        f"Shot Type: {row['Type']}<br>"
+        f"Court Position: ({row['Bounce (x)']:.1f}, {row['Bounce (y)']:.1f})<br>"
+    )
+
+def create_shot_traces(filtered_df, shot_spin_view):
+    """Create one scatter trace per shot bounce"""
+    traces = []
 
     # Add bounce points - PLOT ALL SHOTS, not just those in singles court
     for _, row in filtered_df.iterrows():
-        court_x, court_y = row['Bounce (x)'], row['Bounce (y)']
-        
-        # Plot ALL shots regardless of position
-        marker_size = max(8, min(20, row['Speed (MPH)'] / 3))
-        marker_color = 'gray'
-        line_color = 'gray'
-        marker_symbol = 'circle'  # Default circle
-        
-        # Determine marker symbol based on result
-        if row['Result'] == 'In':
-            marker_color = row['color']
-            line_color = 'white'
-        elif row['Result'] == 'Out':
-            marker_color = 'white'
-            line_color = row['color']
-        else:  # Net
-            marker_color = 'white'
-            line_color = row['color']
-
-        if shot_spin_view:
-            if row['Spin'] == 'Topspin':
-                marker_symbol = 'triangle-up'  # Upward triangle
-            elif row['Spin'] == 'Flat':
-                marker_symbol = 'square'  # Square
-            elif row['Spin'] == 'Slice':
-                marker_symbol = 'diamond'  # Downward triangle
+        marker_symbol, marker_color, line_color = shot_marker_style(row, shot_spin_view)
         
         # Add trace for this shot
-        fig.add_trace(go.Scatter(
-            x=[court_x],
-            y=[court_y],
+        traces.append(go.Scatter(
+            x=[row['Bounce (x)']],
+            y=[row['Bounce (y)']],
             mode='markers',
             marker=dict(
-                size=marker_size,
+                size=shot_marker_size(row),
                 symbol=marker_symbol,
                 color=marker_color,
                 line=dict(width=2, color=line_color),
                 opacity=0.8
             ),
             name=f"{row['Stroke']} - {row['Direction']}",
-            hovertemplate=(
-                f"<b>{row['Player']}</b><br>"
-                f"Stroke: {row['Stroke']}<br>"
-                f"Speed: {row['Speed (MPH)']} MPH<br>"
-                f"Direction: {row['Direction']}<br>"
-                f"Result: {row['Result']}<br>"
-                f"Spin: {row['Spin']}<br>"
-                f"Shot Type: {row['Type']}<br>"
-                f"Court Position: ({court_x:.1f}, {court_y:.1f})<br>"
-                "<extra></extra>"
-            ),
+            hovertemplate=shot_hover_text(row) + "<extra></extra>",
             showlegend=False
         ))
-        
-        total_shots += 1
-        
-        # Only count for zone analysis if within singles court bounds AND valid court length AND not a net shot
-        if (row['Result'] != 'Net' and 
-            -singles_width/2 <= court_x <= singles_width/2 and 
-            0 <= court_y <= COURT_LENGTH):
-            
-            # Determine which horizontal zone (0-2)
-            zone_index = int((court_x - start_x) / zone_width)
-            zone_index = max(0, min(2, zone_index))  # Clamp to valid range
-            zone_counts[zone_index] += 1
-
-            # Depth analysis
-            if court_y >= service_line_y:
-                depth_counts["deep"] += 1
-            else:
-                depth_counts["short"] += 1
-            
-            shots_in_analysis_area += 1
-    
+
+    return traces
+
+def group_live_shots(filtered_df, shot_spin_view):
+    """Group shots by marker style, so live shots extend a fixed set of traces"""
+    groups = {}
+    for _, row in filtered_df.iterrows():
+        style = shot_marker_style(row, shot_spin_view)
+        group = groups.setdefault('|'.join(style), {'style': style, 'x': [], 'y': [], 'size': [], 'text': []})
+        group['x'].append(row['Bounce (x)'])
+        group['y'].append(row['Bounce (y)'])
+        group['size'].append(shot_marker_size(row))
+        group['text'].append(shot_hover_text(row))
+    return groups
+
+def create_live_shot_trace(group):
+    """Create a scatter trace holding all live shots of one marker style"""
+    marker_symbol, marker_color, line_color = group['style']
+    return go.Scatter(
+        x=group['x'],
+        y=group['y'],
+        mode='markers',
+        marker=dict(
+            size=group['size'],
+            symbol=marker_symbol,
+            color=marker_color,
+            line=dict(width=2, color=line_color),
+            opacity=0.8
+        ),
+        text=group['text'],
+        name='Live shots',
+        hovertemplate="%{text}<extra></extra>",
+        showlegend=False
+    )
+
+def count_shot_zones(filtered_df):
+    """Count shots per placement zone and depth zone"""
+    x = filtered_df['Bounce (x)'].to_numpy(dtype=float)
+    y = filtered_df['Bounce (y)'].to_numpy(dtype=float)
+
+    # Only count for zone analysis if within singles court bounds AND valid court length AND not a net shot
+    in_analysis_area = (
+        (filtered_df['Result'] != 'Net').to_numpy() &
+        (-singles_width/2 <= x) & (x <= singles_width/2) &
+        (0 <= y) & (y <= COURT_LENGTH)
+    )
+    x, y = x[in_analysis_area], y[in_analysis_area]
+
+    # Determine which horizontal zone (0-2)
+    zone_index = np.clip(((x - start_x) / zone_width).astype(int), 0, 2)
+    zone_counts = np.bincount(zone_index, minlength=3).tolist()
+
+    # Depth analysis
+    deep = int((y >= service_line_y).sum())
+    depth_counts = {"short": len(y) - deep, "deep": deep}
+
+    return zone_counts, depth_counts
+
+def create_zone_annotations(zone_counts, depth_counts):
+    """Create zone and depth percentage annotations from shot counts"""
+    annotations = []
+    shots_in_analysis_area = sum(zone_counts)  # For zone percentage calculations
+
+    if shots_in_analysis_area == 0:
+        return annotations
+
     # Add zone percentages (only for shots in analysis area)
     zone_labels_x = [start_x + (zone_width * (i + 0.5)) for i in range(3)]
-    zone_names = ["Ad", "Center", "Deuce"]
-    
-    if shots_in_analysis_area > 0:  # Use shots_in_analysis_area instead of total_shots
-        for i, (x_pos, zone_name, count) in enumerate(zip(zone_labels_x, zone_names, zone_counts)):
-            percentage = (count / shots_in_analysis_area) * 100
-            fig.add_annotation(
-                x=x_pos, 
-                y=COURT_LENGTH + 1.5, 
-                text=f"{percentage:.1f}%",
-                showarrow=False,
-                font=dict(color="darkgray", size=12, family="Arial Bold")
-            )
-        
-        # Add depth zone percentages
-        short_y = service_line_y * 0.5
-        deep_y = service_line_y + (COURT_LENGTH - service_line_y) * 0.5
-        
-        fig.add_annotation(
-            x=6.5, y=short_y,
-            text=f"{(depth_counts['short']/shots_in_analysis_area)*100:.1f}%",
-            showarrow=False,
-            font=dict(color="darkgray", size=12, family="Arial Bold")
-        )
-        
-        fig.add_annotation(
-            x=6.5, y=deep_y,
-            text=f"{(depth_counts['deep']/shots_in_analysis_area)*100:.1f}%",
+
+    for x_pos, count in zip(zone_labels_x, zone_counts):
+        percentage = (count / shots_in_analysis_area) * 100
+        annotations.append(dict(
+            x=x_pos, 
+            y=COURT_LENGTH + 1.5, 
+            text=f"{percentage:.1f}%",
             showarrow=False,
             font=dict(color="darkgray", size=12, family="Arial Bold")
-        )
+        ))
+    
+    # Add depth zone percentages
+    short_y = service_line_y * 0.5
+    deep_y = service_line_y + (COURT_LENGTH - service_line_y) * 0.5
+    
+    annotations.append(dict(
+        x=6.5, y=short_y,
+        text=f"{(depth_counts['short']/shots_in_analysis_area)*100:.1f}%",
+        showarrow=False,
+        font=dict(color="darkgray", size=12, family="Arial Bold")
+    ))
+    
+    annotations.append(dict(
+        x=6.5, y=deep_y,
+        text=f"{(depth_counts['deep']/shots_in_analysis_area)*100:.1f}%",
+        showarrow=False,
+        font=dict(color="darkgray", size=12, family="Arial Bold")
+    ))
+
+    return annotations
+
+def add_shot_data(fig, filtered_df, shot_spin_view):
+    if filtered_df.empty:
+        return fig
+
+    fig.add_traces(create_shot_traces(filtered_df, shot_spin_view))
+
+    # Calculate zone statistics (only for shots within singles court)
+    zone_counts, depth_counts = count_shot_zones(filtered_df)
+    for annotation in create_zone_annotations(zone_counts, depth_counts):
+        fig.add_annotation(annotation)
 
     return fig
 
+def create_outcome_overlay(rates, totals):
+    """Create a heatmap trace of win/error/continuation rates per court zone"""
+    win, error, continuation = rates
+    text = [
+        [
+            f"W {win[d][z]:.0%}<br>E {error[d][z]:.0%}<br>C {continuation[d][z]:.0%}" if totals[d][z] else ""
+            for z in range(3)
+        ]
+        for d in range(2)
+    ]
+
+    return go.Heatmap(
+        # Brick edges follow the zone lines and the service line
+        x=[start_x + (zone_width * i) for i in range(4)],
+        y=[0, service_line_y, COURT_LENGTH],
+        z=np.nan_to_num(win).tolist(),
+        text=text,
+        texttemplate="%{text}",
+        textfont=dict(color="dimgray", size=11),
+        customdata=totals.tolist(),
+        colorscale='Greens',
+        zmin=0, zmax=1,
+        opacity=0.35,
+        showscale=False,
+        hovertemplate="%{text}<br>Shots: %{customdata}<extra></extra>",
+        name='outcomes'
+    )
+
 def create_placement_analysis(df):
     """Create placement analysis charts"""
     # Deep vs Short analysis
@@ -0,0 +1,136 @@
+"""
+Live-session feed that tails a growing SwingVision export.
+
+Set LIVE_EXPORT_PATH to a CSV, JSON lines or xlsx export with the same
+columns as the Shots sheet to enable live mode. CSV and JSON lines files are
+read from the last byte offset, so only appended rows are parsed. An xlsx
+file cannot be read partially and is re-read whenever it is re-saved, keeping
+only the rows beyond those already seen.
+"""
+import bisect
+import io
+import os
+import zipfile
+
+import pandas as pd
+from utils.data_reader import convert_numeric
+
+LIVE_EXPORT_PATH = os.environ.get('LIVE_EXPORT_PATH')
+LIVE_POLL_INTERVAL = int(os.environ.get('LIVE_POLL_INTERVAL', '2000'))  # milliseconds
+
+
+class ShotFeed:
+    """Incremental reader for a local shot export"""
+
+    def __init__(self, path, start_label=0):
+        self.path = path
+        self.next_label = start_label
+        self.format = os.path.splitext(path)[1].lower()
+        self.offset = 0  # bytes consumed (csv/jsonl)
+        self.header = None  # csv header line
+        self.rows_seen = 0  # rows consumed (xlsx)
+        self.mtime = None
+
+    def poll(self):
+        """Return shots appended since the last poll, labelled after the previous ones"""
+        if not os.path.exists(self.path):
+            return pd.DataFrame()
+
+        if self.format in ('.xlsx', '.xls'):
+            new_shots = self._poll_excel()
+        else:
+            new_shots = self._poll_lines()
+
+        if new_shots.empty:
+            return new_shots
+
+        new_shots = convert_numeric(new_shots)
+        new_shots.index = pd.RangeIndex(self.next_label, self.next_label + len(new_shots))
+        self.next_label += len(new_shots)
+        return new_shots
+
+    def _poll_lines(self):
+        if os.path.getsize(self.path) < self.offset:
+            # File was truncated or replaced, start over
+            self.offset, self.header = 0, None
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+
+        # Only consume complete lines, a partially written row is read next time
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame()
+        self.offset += end
+        text = chunk[:end].decode('utf-8')
+
+        if self.format == '.csv':
+            if self.header is None:
+                self.header, _, text = text.partition('\n')
+            if not text.strip():
+                return pd.DataFrame()
+            return pd.read_csv(io.StringIO(self.header + '\n' + text))
+
+        if not text.strip():
+            return pd.DataFrame()
+        return pd.read_json(io.StringIO(text), lines=True)
+
+    def _poll_excel(self):
+        mtime = os.path.getmtime(self.path)
+        if mtime == self.mtime:
+            return pd.DataFrame()
+        self.mtime = mtime
+
+        try:
+            shots = pd.read_excel(self.path, sheet_name='Shots')
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # Workbook is still being saved, retry on the next poll
+            self.mtime = None
+            return pd.DataFrame()
+        new_shots = shots.iloc[self.rows_seen:].reset_index(drop=True)
+        self.rows_seen = len(shots)
+        return new_shots
+
+
+class LiveShotBuffer:
+    """Append-only store of live shots, kept as chunks ordered by index label"""
+
+    def __init__(self):
+        # Replaced as a whole on append, so readers always see a consistent tuple
+        self.chunks = ()
+        self._frame = ((), None)
+
+    def append(self, shots):
+        """Append shots labelled after every shot already in the buffer"""
+        chunks = list(self.chunks)
+        # Merge equally sized trailing chunks (like a binary counter), so each row
+        # is copied O(log n) times and the buffer holds O(log n) chunks
+        while chunks and len(chunks[-1]) <= len(shots):
+            shots = pd.concat([chunks.pop(), shots])
+        chunks.append(shots)
+        self.chunks = tuple(chunks)
+
+    def after(self, label):
+        """Shots with an index label greater than label"""
+        chunks = self.chunks
+        starts = [chunk.index[0] for chunk in chunks]
+        i = max(bisect.bisect_right(starts, label) - 1, 0)
+        tail = [chunk.iloc[chunk.index.searchsorted(label, side='right'):] for chunk in chunks[i:]]
+        return pd.concat(tail) if tail else pd.DataFrame()
+
+    def frame(self):
+        """All buffered shots as one frame, or None when the buffer is empty"""
+        chunks = self.chunks
+        cached_chunks, frame = self._frame
+        if cached_chunks is chunks:
+            return frame
+        frame = pd.concat(chunks) if chunks else None
+        self._frame = (chunks, frame)
+        return frame
+
+    def chunk_of(self, label):
+        """Chunk holding the shot with this index label"""
+        chunks = self.chunks
+        starts = [chunk.index[0] for chunk in chunks]
+        return chunks[bisect.bisect_right(starts, label) - 1]
@@ -0,0 +1,203 @@
+"""
+Shot outcome model: win, error and continuation rates per court zone.
+
+Every shot is joined to its point through the Set/Game/Point columns. The
+final shot of a point is a win when it landed In and an error otherwise, all
+other shots are continuations. Shots are binned into the 3 placement zones and
+2 depth zones used by add_shot_data, and counted per player and stroke into
+dense arrays so court overlays never need a groupby.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from utils.graphs import start_x, zone_width, service_line_y
+
+OUTCOMES = ['Win', 'Error', 'Continuation']
+DEPTHS = ['short', 'deep']
+ZONES = ['Ad', 'Center', 'Deuce']
+POINT_COLS = ['Set', 'Game', 'Point']
+CACHE_DIR = './cache/outcomes'
+# Bump when the labelling rules, zone binning or saved arrays change, so older caches are not reused
+MODEL_FORMAT = 1
+
+
+def label_point_outcomes(shots):
+    """Label each shot with the outcome of its point from the shot's perspective"""
+    is_last = ~shots.duplicated(POINT_COLS, keep='last')
+    is_in = shots['Result'] == 'In'
+    outcome = np.select([is_last & is_in, is_last], ['Win', 'Error'], default='Continuation')
+    return pd.Series(outcome, index=shots.index)
+
+
+def shot_zone_cells(shots):
+    """Depth and placement zone of transformed shots, out-of-court shots go to the nearest zone"""
+    x = shots['Bounce (x)'].to_numpy(dtype=float)
+    y = shots['Bounce (y)'].to_numpy(dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    zone = np.clip(np.floor((np.nan_to_num(x) - start_x) / zone_width), 0, 2).astype(int)
+    depth = (np.nan_to_num(y) >= service_line_y).astype(int)
+    return depth, zone, valid
+
+
+def dataset_version(shots):
+    """Hash of the model format and the columns the outcome model depends on"""
+    cols = ['Player', 'Stroke', 'Outcome', 'Bounce (x)', 'Bounce (y)']
+    hashes = pd.util.hash_pandas_object(shots[cols], index=True).to_numpy()
+    digest = hashlib.sha1(str(MODEL_FORMAT).encode())
+    digest.update(hashes.tobytes())
+    return digest.hexdigest()[:16]
+
+
+class OutcomeModel:
+    """Dense outcome counts and rates indexed by player, stroke, outcome, depth and zone"""
+
+    def __init__(self, players, strokes, counts, rates=None):
+        # Replaced as a whole by update, so concurrent readers see one consistent snapshot
+        self.state = (list(players), list(strokes), counts, self._rates(counts) if rates is None else rates)
+        # Bumped on every update, lets views tell whether their rates are stale
+        self.version = 0
+
+    @property
+    def players(self):
+        return self.state[0]
+
+    @property
+    def strokes(self):
+        return self.state[1]
+
+    @property
+    def counts(self):
+        return self.state[2]
+
+    @property
+    def rates(self):
+        return self.state[3]
+
+    @staticmethod
+    def _rates(counts):
+        totals = counts.sum(axis=-3, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(totals > 0, counts / totals, np.nan)
+
+    @classmethod
+    def build(cls, shots):
+        """Build the model from transformed shots with an Outcome column"""
+        players = shots['Player'].dropna().unique()
+        strokes = shots['Stroke'].dropna().unique()
+        model = cls(
+            players,
+            strokes,
+            np.zeros((len(players), len(strokes), len(OUTCOMES), len(DEPTHS), len(ZONES)), dtype=np.int64),
+        )
+        model.add(shots)
+        return model
+
+    @staticmethod
+    def _axis_index(counts, values, names, axis):
+        """Map values to positions along an axis, growing names and counts for unseen values"""
+        new_names = [name for name in pd.unique(values) if name not in names]
+        if new_names:
+            names.extend(new_names)
+            pad = [(0, 0)] * counts.ndim
+            pad[axis] = (0, len(new_names))
+            counts = np.pad(counts, pad)
+        return counts, pd.Index(names).get_indexer(values)
+
+    def update(self, changes):
+        """Apply (transformed shots, sign) changes and publish the new arrays at once"""
+        players, strokes, counts, _ = self.state
+        # Work on copies: the published arrays may be read-only memory maps or in use by readers
+        players, strokes, counts = list(players), list(strokes), np.array(counts)
+
+        for shots, sign in changes:
+            shots = shots[shots['Player'].notna() & shots['Stroke'].notna()]
+            depth, zone, valid = shot_zone_cells(shots)
+            shots, depth, zone = shots[valid], depth[valid], zone[valid]
+            if shots.empty:
+                continue
+
+            counts, player = self._axis_index(counts, shots['Player'], players, 0)
+            counts, stroke = self._axis_index(counts, shots['Stroke'], strokes, 1)
+            outcome = pd.Index(OUTCOMES).get_indexer(shots['Outcome'])
+            np.add.at(counts, (player, stroke, outcome, depth, zone), sign)
+
+        self.state = (players, strokes, counts, self._rates(counts))
+        self.version += 1
+
+    def add(self, shots, sign=1):
+        """Add (or with sign=-1 remove) transformed shots from the counts"""
+        self.update([(shots, sign)])
+
+    def zone_rates(self, player, strokes=None):
+        """Outcome rates (outcomes, depths, zones) and shot totals (depths, zones) for a player"""
+        players, all_strokes, counts, rates = self.state
+        empty = np.full((len(OUTCOMES), len(DEPTHS), len(ZONES)), np.nan)
+        if player not in players:
+            return empty, np.zeros((len(DEPTHS), len(ZONES)), dtype=int)
+        player_idx = players.index(player)
+
+        stroke_idx = [all_strokes.index(s) for s in (strokes or all_strokes) if s in all_strokes]
+        if not stroke_idx:
+            return empty, np.zeros((len(DEPTHS), len(ZONES)), dtype=int)
+        if len(stroke_idx) == 1:
+            return rates[player_idx, stroke_idx[0]], counts[player_idx, stroke_idx[0]].sum(axis=0)
+
+        stroke_counts = counts[player_idx, stroke_idx].sum(axis=0)
+        return self._rates(stroke_counts), stroke_counts.sum(axis=0)
+
+    def save(self, path):
+        """Write the arrays to a temp directory and move it into place in one rename"""
+        if os.path.isdir(path):
+            return
+        players, strokes, counts, rates = self.state
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+        try:
+            np.save(os.path.join(tmp, 'counts.npy'), counts)
+            np.save(os.path.join(tmp, 'rates.npy'), rates)
+            with open(os.path.join(tmp, 'labels.json'), 'w') as f:
+                json.dump({'format': MODEL_FORMAT, 'players': players, 'strokes': strokes}, f)
+            os.replace(tmp, path)
+        except OSError:
+            # Another worker published this version first, keep its copy
+            if not os.path.isdir(path):
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a saved model, None when it was saved in another format"""
+        with open(os.path.join(path, 'labels.json')) as f:
+            labels = json.load(f)
+        if labels.get('format') != MODEL_FORMAT:
+            return None
+        return cls(
+            labels['players'],
+            labels['strokes'],
+            np.load(os.path.join(path, 'counts.npy'), mmap_mode='r'),
+            np.load(os.path.join(path, 'rates.npy'), mmap_mode='r'),
+        )
+
+
+def load_outcome_model(shots):
+    """Load the cached model for this dataset version, building it on a cache miss"""
+    path = os.path.join(CACHE_DIR, dataset_version(shots))
+    # Version directories only appear complete, see OutcomeModel.save
+    if os.path.isdir(path):
+        model = OutcomeModel.load(path)
+        if model is not None:
+            return model
+        # Same hash from another format, rebuild in memory and leave the cache alone
+        return OutcomeModel.build(shots)
+
+    model = OutcomeModel.build(shots)
+    model.save(path)
+    return model
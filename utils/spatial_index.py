@@ -0,0 +1,149 @@
+import copy
+
+import numpy as np
+from utils.graphs import start_x, zone_width, service_line_y
+
+# Grid cells are aligned with the court zones: every placement zone and every
+# depth zone (baseline to service line, service line to net) is split evenly
+# into CELLS_PER_ZONE cells along each axis.
+CELLS_PER_ZONE = 4
+CELL_WIDTH = zone_width / CELLS_PER_ZONE
+CELL_HEIGHT = service_line_y / CELLS_PER_ZONE
+# Minimum number of appended points scanned linearly before the grid is rebuilt
+PENDING_LIMIT = 64
+
+
+class _Grid:
+    """Immutable snapshot of the indexed points and their cell buckets"""
+
+    def __init__(self, labels, x, y):
+        self.labels, self.x, self.y = labels, x, y
+        # Points past n_indexed are pending: appended but not yet bucketed
+        self.n_indexed = len(x)
+
+        if self.n_indexed == 0:
+            self.col_min = self.row_min = 0
+            self.n_cols = self.n_rows = 0
+            self.order = np.empty(0, dtype=int)
+            self.offsets = np.zeros(1, dtype=int)
+            return
+
+        cols = np.floor((x - start_x) / CELL_WIDTH).astype(int)
+        rows = np.floor(y / CELL_HEIGHT).astype(int)
+        self.col_min, self.row_min = cols.min(), rows.min()
+        self.n_cols = cols.max() - self.col_min + 1
+        self.n_rows = rows.max() - self.row_min + 1
+
+        # Points are sorted by cell so each cell is a contiguous slice of `order`
+        cell_ids = (cols - self.col_min) * self.n_rows + (rows - self.row_min)
+        self.order = np.argsort(cell_ids, kind='stable')
+        self.offsets = np.searchsorted(
+            cell_ids[self.order], np.arange(self.n_cols * self.n_rows + 1)
+        )
+
+    def with_pending(self, labels, x, y):
+        """Copy of this grid with extra points left pending"""
+        grid = copy.copy(self)
+        grid.labels, grid.x, grid.y = labels, x, y
+        return grid
+
+    def candidates(self, x0, x1, y0, y1):
+        """Positions of points in the grid cells overlapping a bounding box"""
+        pending = np.arange(self.n_indexed, len(self.x))
+        if self.n_cols == 0:
+            return pending
+
+        col0 = max(int(np.floor((x0 - start_x) / CELL_WIDTH)) - self.col_min, 0)
+        col1 = min(int(np.floor((x1 - start_x) / CELL_WIDTH)) - self.col_min, self.n_cols - 1)
+        row0 = max(int(np.floor(y0 / CELL_HEIGHT)) - self.row_min, 0)
+        row1 = min(int(np.floor(y1 / CELL_HEIGHT)) - self.row_min, self.n_rows - 1)
+        if col0 > col1 or row0 > row1:
+            return pending
+
+        # Rows of one column are adjacent, so each column is a single slice
+        slices = [
+            self.order[self.offsets[col * self.n_rows + row0]:self.offsets[col * self.n_rows + row1 + 1]]
+            for col in range(col0, col1 + 1)
+        ]
+        return np.concatenate(slices + [pending])
+
+
+class CourtGridIndex:
+    """Uniform grid over transformed bounce coordinates for region queries"""
+
+    def __init__(self, df):
+        # Replaced as a whole by extend, so concurrent queries see one consistent snapshot
+        self.grid = _Grid(*self._valid_points(df))
+
+    @staticmethod
+    def _valid_points(df):
+        x = df['Bounce (x)'].to_numpy(dtype=float)
+        y = df['Bounce (y)'].to_numpy(dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        return df.index.to_numpy()[valid], x[valid], y[valid]
+
+    def extend(self, df):
+        """Add new shots, scanned linearly until the grid is rebuilt"""
+        grid = self.grid
+        labels, x, y = self._valid_points(df)
+        labels = np.concatenate([grid.labels, labels])
+        x = np.concatenate([grid.x, x])
+        y = np.concatenate([grid.y, y])
+
+        # Rebuild once pending points are a sizeable fraction of the index
+        if len(x) - grid.n_indexed > max(PENDING_LIMIT, grid.n_indexed // 4):
+            self.grid = _Grid(labels, x, y)
+        else:
+            self.grid = grid.with_pending(labels, x, y)
+
+    def query_box(self, x_range, y_range):
+        """Return the index labels of shots inside a box selection"""
+        grid = self.grid
+        x0, x1 = sorted(x_range)
+        y0, y1 = sorted(y_range)
+        candidates = grid.candidates(x0, x1, y0, y1)
+        px, py = grid.x[candidates], grid.y[candidates]
+        inside = (px >= x0) & (px <= x1) & (py >= y0) & (py <= y1)
+        return grid.labels[candidates[inside]]
+
+    def query_polygon(self, poly_x, poly_y):
+        """Return the index labels of shots inside a lasso polygon"""
+        grid = self.grid
+        poly_x = np.asarray(poly_x, dtype=float)
+        poly_y = np.asarray(poly_y, dtype=float)
+        if len(poly_x) < 3:
+            return grid.labels[:0]
+
+        candidates = grid.candidates(poly_x.min(), poly_x.max(), poly_y.min(), poly_y.max())
+        px, py = grid.x[candidates], grid.y[candidates]
+
+        # Even-odd ray casting, vectorized over candidate points
+        inside = np.zeros(len(candidates), dtype=bool)
+        next_x, next_y = np.roll(poly_x, -1), np.roll(poly_y, -1)
+        for ax, ay, bx, by in zip(poly_x, poly_y, next_x, next_y):
+            if ay == by:
+                continue
+            crosses = (ay > py) != (by > py)
+            intersect_x = ax + (py - ay) * (bx - ax) / (by - ay)
+            inside ^= crosses & (px < intersect_x)
+        return grid.labels[candidates[inside]]
+
+    def query(self, selected_data):
+        """Resolve a dcc.Graph selectedData payload to shot index labels"""
+        if not selected_data:
+            return None
+        if selected_data.get('lassoPoints'):
+            lasso = selected_data['lassoPoints']
+            return self.query_polygon(lasso['x'], lasso['y'])
+        if selected_data.get('range'):
+            box = selected_data['range']
+            return self.query_box(box['x'], box['y'])
+        return None
+
+
+def build_player_indexes(df):
+    """Build one CourtGridIndex per player perspective"""
+    return {
+        player: CourtGridIndex(df[df['Player'] == player])
+        for player in df['Player'].unique()
+    }